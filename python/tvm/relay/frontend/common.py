@@ -17,6 +17,7 @@
 # pylint: disable=broad-except
 """Common utilities"""
 from __future__ import absolute_import as _abs
+import functools
 import logging
 import numpy as np
 
@@ -391,19 +392,24 @@ class AttrCvt(object):
         self._transforms = transforms if transforms else {}
         self._excludes = excludes if excludes else []
         self._disables = disables if disables else []
-        self._ignores = ignores if ignores else []
+        self._ignores = list(ignores) if ignores else []
+        self._ignores.extend(
+            [
+                "_output_shapes",
+                "_input_shapes",
+                "T",
+                "use_cudnn_on_gpu",
+                "_node_name",
+                "is_training",
+                "_target_layout",
+                # ignore 'tvm_custom' always
+                "tvm_custom",
+            ]
+        )
         self._extras = extras if extras else {}
         self._custom_check = custom_check
 
     def __call__(self, inputs, attrs, *args):
-        self._ignores.append("_output_shapes")
-        self._ignores.append("_input_shapes")
-        self._ignores.append("T")
-        self._ignores.append("use_cudnn_on_gpu")
-        self._ignores.append("_node_name")
-        self._ignores.append("is_training")
-        self._ignores.append("_target_layout")
-
         # apply custom check
         if self._custom_check:
             func, msg = self._custom_check
@@ -416,9 +422,6 @@ class AttrCvt(object):
             assert callable(self._op_name), "op_name can either be string or callable"
             op_name = self._op_name(attrs)
 
-        # ignore 'tvm_custom' always
-        self._ignores.append("tvm_custom")
-
         # convert attributes
         new_attrs = {}
         for k in attrs.keys():
@@ -865,6 +868,23 @@ def lstm_cell(
     return outputs_list, hidden_state, cell_state
 
 
+# integer constants shared by the dynamic autopad computation
+_AUTOPAD_ZERO = _op.const(0, dtype="int64")
+_AUTOPAD_ONE = _op.const(1, dtype="int64")
+_AUTOPAD_TWO = _op.const(2, dtype="int64")
+# the N and C axes are never padded
+_AUTOPAD_NC_PAD = _op.const(np.zeros([2, 2], dtype="int64"), dtype="int64")
+
+
+@functools.lru_cache(maxsize=128)
+def _autopad_consts(strides, dilated_kernel_shape):
+    """The stride and dilated kernel constants of the dynamic autopad, shared by equal layers."""
+    return (
+        _op.const(np.asarray(strides, dtype="int64"), dtype="int64"),
+        _op.const(np.asarray(dilated_kernel_shape, dtype="int64"), dtype="int64"),
+    )
+
+
 def autopad(
     data,
     strides,
@@ -878,22 +898,47 @@ def autopad(
     """
     Perform autopadding with dynamic input shapes
     """
+    if isinstance(pad_value, (float, int)):
+        pad_value = _op.const(pad_value)
+
+    strides_np = np.asarray(strides, dtype="int64")
+    num_spatial = min(len(kernel_shape), len(dilations))
+    kernel_np = np.asarray(kernel_shape[:num_spatial], dtype="int64")
+    dilations_np = np.asarray(dilations[:num_spatial], dtype="int64")
+    dilated_kernel_np = (kernel_np - 1) * dilations_np + 1
+
+    # with a static input shape the padding can be computed up front
+    ttype = infer_type(data).checked_type
+    if not _ty.is_dynamic(ttype):
+        shape = np.array([int(dim) for dim in ttype.shape[2:]], dtype="int64")
+        mod = shape % strides_np
+        total_pad = np.where(
+            mod == 0,
+            np.maximum(dilated_kernel_np - strides_np, 0),
+            np.maximum(dilated_kernel_np - mod, 0),
+        )
+        if deconv:
+            total_pad = np.array(kernel_shape, dtype="int64") - 1 - total_pad
+        pad_before = total_pad // 2
+        pad_after = total_pad - pad_before
+        if "LOWER" in mode:
+            pad = np.stack([pad_after, pad_before], axis=1)
+        else:
+            pad = np.stack([pad_before, pad_after], axis=1)
+        pad = np.concatenate([np.zeros([2, 2], dtype="int64"), pad], axis=0)
+        return _op.nn.pad(data, _op.const(pad, dtype="int64"), pad_value, pad_type)
+
     # get attributes as constants
-    strides = _op.const(np.array(strides), dtype="int64")
-    dilated_kernel_shape = _op.const(
-        np.array(
-            [(kernel - 1) * dilation + 1 for kernel, dilation in zip(kernel_shape, dilations)]
-        ),
-        dtype="int64",
+    strides, dilated_kernel_shape = _autopad_consts(
+        tuple(strides_np.tolist()), tuple(dilated_kernel_np.tolist())
     )
     # get input shape
-    ndim = len(infer_shape(data))
-    shape = _op.strided_slice(shape_of(data, dtype="int64"), [2], [ndim])
+    ndim = len(ttype.shape)
+    shape = _op.strided_slice(_op.shape_of(data, dtype="int64"), [2], [ndim])
 
-    # set up integer constants
-    zero = _op.const(0, dtype="int64")
-    one = _op.const(1, dtype="int64")
-    two = _op.const(2, dtype="int64")
+    zero = _AUTOPAD_ZERO
+    one = _AUTOPAD_ONE
+    two = _AUTOPAD_TWO
 
     # Calculate total padding
     mod = _op.mod(shape, strides)
@@ -920,10 +965,7 @@ def autopad(
         )
 
     # pad N and C with zeros
-    pad = _op.concatenate([_op.const(np.zeros([2, 2], dtype="int64"), dtype="int64"), pad], axis=0)
-
-    if isinstance(pad_value, (float, int)):
-        pad_value = _op.const(pad_value)
+    pad = _op.concatenate([_AUTOPAD_NC_PAD, pad], axis=0)
 
     return _op.nn.pad(data, fold_constant(pad), pad_value, pad_type)
 
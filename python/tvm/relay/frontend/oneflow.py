@@ -18,10 +18,12 @@
 # pylint: disable=import-outside-toplevel
 """OneFlow: OneFlow is a performance-centered and open-source deep learning framework."""
 
+import contextlib
 import os
 import re
-import copy
+import threading
 import warnings
+from types import MappingProxyType
 
 import numpy as np
 import tvm
@@ -38,59 +40,93 @@ from .common import (
     Renamer,
     fold_constant,
     get_relay_op,
-    infer_channels,
-    infer_shape,
     infer_type,
+    logger,
     new_var,
 )
 
 __all__ = ["from_oneflow"]
 
-FLOW_2_STR_DTYPE = {
-    2: "float32",
-    3: "float64",
-    6: "int64",
-    5: "int32",
-    4: "int8",
-    7: "uint8",
-    9: "float16",
-}
+# oneflow is imported on first use and then kept here
+_ONEFLOW = None
+
 
+def _get_oneflow():
+    """Import oneflow lazily, so that importing the frontend stays cheap."""
+    global _ONEFLOW
+    if _ONEFLOW is None:
+        try:
+            import oneflow
+        except ImportError:
+            raise ImportError("please check that OneFlow is installed")
+
+        _ONEFLOW = oneflow
+    return _ONEFLOW
+
+
+# read-only, the table is shared by every conversion
+FLOW_2_STR_DTYPE = MappingProxyType(
+    {
+        2: "float32",
+        3: "float64",
+        6: "int64",
+        5: "int32",
+        4: "int8",
+        7: "uint8",
+        9: "float16",
+    }
+)
 
-def is_input_op(node):
-    """Return true when the node is the input of the graph."""
-    return node.WhichOneof("op_type") == "input_conf"
 
+def get_nodes_by_type(nodes):
+    """Group the nodes by op type with one pass over the graph, keeping the graph order."""
+    node_types = {}
+    for node_name, node in nodes.items():
+        node_types.setdefault(node.WhichOneof("op_type"), []).append((node_name, node))
+    return node_types
 
-def is_user_op(node):
-    """Return true when the node is the intermediate variables of graph."""
-    return node.WhichOneof("op_type") == "user_conf"
 
+# Relay expressions hash by object identity, so the results of type inference
+# and the input names of _input_names can be shared between converters. The
+# caches belong to a OneflowGraph, they are only referenced here, per thread,
+# while the graph converts its ops.
+_GRAPH_CACHES = threading.local()
 
-def is_output_op(node):
-    """Return true when the node is the output of the graph."""
-    return node.WhichOneof("op_type") == "output_conf"
 
+@contextlib.contextmanager
+def _use_graph_caches(infer_type_cache, input_names_cache):
+    """Let the converters of this thread use the caches of a OneflowGraph."""
+    saved = _graph_cache("infer_type"), _graph_cache("input_names")
+    _GRAPH_CACHES.infer_type, _GRAPH_CACHES.input_names = infer_type_cache, input_names_cache
+    try:
+        yield
+    finally:
+        _GRAPH_CACHES.infer_type, _GRAPH_CACHES.input_names = saved
 
-def is_param_op(node):
-    """Return true when the node is the intermediate variables of model(saved)."""
-    return node.WhichOneof("op_type") == "variable_conf"
 
+def _graph_cache(kind):
+    """The cache of the graph this thread converts, None outside a conversion."""
+    return getattr(_GRAPH_CACHES, kind, None)
 
-def get_node_info(node):
-    """
-    Get basic information about nodes: shape, data_type
-    """
-    # list->tuple
-    shape = tuple(node.input_conf.blob_conf.shape.dim)
-    # get data type
-    dtype = node.input_conf.blob_conf.data_type
-    if dtype in list(FLOW_2_NP_DTYPE.keys()):
-        data_type = FLOW_2_NP_DTYPE[dtype]
-    else:
-        raise IndexError("Please check the data type of your node: %s" % node.name)
 
-    return shape, data_type
+def _cached_infer_type(node):
+    """A memoized version of infer_type for the expressions of the graph being converted."""
+    cache = _graph_cache("infer_type")
+    if cache is None:
+        return infer_type(node)
+    ret = cache.get(node)
+    if ret is None:
+        ret = infer_type(node)
+        cache[node] = ret
+    return ret
+
+
+def _cached_infer_shape(node):
+    """A memoized version of infer_shape, sharing the cache of _cached_infer_type."""
+    checked_type = _cached_infer_type(node).checked_type
+    if hasattr(checked_type, "shape"):
+        return get_const_tuple(checked_type.shape)
+    return checked_type
 
 
 def _dtype_shape_promotion(inputs):
@@ -98,62 +134,50 @@ def _dtype_shape_promotion(inputs):
 
     dtype_order = ["bool", "int8", "int16", "int32", "int64", "float32", "float64"]
 
-    ranks = [len(infer_shape(x)) for x in inputs]
+    ranks = [len(_cached_infer_shape(x)) for x in inputs]
     if set(ranks) == set([1, 0]):
         for i, r in enumerate(ranks):
             if r == 0:
                 inputs[i] = _op.expand_dims(inputs[i], axis=0)
 
-    dtypes = set(dtype_order.index(infer_type(x).checked_type.dtype) for x in inputs)
+    dtypes = set(dtype_order.index(_cached_infer_type(x).checked_type.dtype) for x in inputs)
     if len(dtypes) == 1:
         return inputs
     max_dtype = dtype_order[max(dtypes)]
     for i, input_op in enumerate(inputs):
-        if infer_type(input_op).checked_type.dtype != max_dtype:
+        if _cached_infer_type(input_op).checked_type.dtype != max_dtype:
             inputs[i] = input_op.astype(max_dtype)
     return inputs
 
 
+# Conversion of each kind of the AttrValue oneof to a python value.
+_ATTR_HANDLERS = {
+    "at_list_float": lambda v: tuple(v.at_list_float.val),
+    "at_list_int32": lambda v: tuple(v.at_list_int32.val),
+    "at_list_int64": lambda v: tuple(v.at_list_int64.val),
+    "at_string": lambda v: v.at_string,
+    "at_shape": lambda v: tuple(v.at_shape.dim),
+    "at_bool": lambda v: v.at_bool,
+    "at_double": lambda v: v.at_double,
+    "at_float": lambda v: v.at_float,
+    "at_int32": lambda v: v.at_int32,
+    "at_int64": lambda v: v.at_int64,
+}
+
+
 def parse_attr(attr):
     """Parse attribute of user op in oneflow."""
     attrs = {}
-    for a in attr:
-        attr_str = str(attr[a])
-
-        if attr_str[0:7] == "at_list":
-            attr_str_ = attr_str.split(" ")[0]
-
-            if attr_str_ == "at_list_float":
-                attrs[a] = tuple(attr[a].at_list_float.val)
-            elif attr_str_ == "at_list_int32":
-                attrs[a] = tuple(attr[a].at_list_int32.val)
-            elif attr_str_ == "at_list_int64":
-                attrs[a] = tuple(attr[a].at_list_int64.val)
-
-        elif attr_str.split(":")[0] == "at_string":
-            attrs[a] = attr[a].at_string
-
-        elif attr_str.split(" ")[0] == "at_shape":
-            attrs[a] = tuple(list(attr[a].at_shape.dim))
-
-        else:
-            attr_str_ = attr_str.split(":")[0]
-            if attr_str_ == "at_bool":
-                attrs[a] = attr[a].at_bool
-            elif attr_str_ == "at_double":
-                attrs[a] = attr[a].at_double
-            elif attr_str_ == "at_float":
-                attrs[a] = attr[a].at_float
-            elif attr_str_ == "at_int32":
-                attrs[a] = attr[a].at_int32
-            elif attr_str_ == "at_int64":
-                attrs[a] = attr[a].at_int64
+    for a, v in attr.items():
+        handler = _ATTR_HANDLERS.get(v.WhichOneof("value"))
+        if handler is not None:
+            attrs[a] = handler(v)
 
     return attrs
 
 
 def shape_of(x, dtype="int64"):
-    ttype = infer_type(x).checked_type
+    ttype = _cached_infer_type(x).checked_type
     if not _ty.is_dynamic(ttype):
         shape = list(ttype.shape)
         return _expr.const(shape, dtype)
@@ -161,6 +185,136 @@ def shape_of(x, dtype="int64"):
     return _op.shape_of(x, dtype)
 
 
+# ops that FoldConstant evaluates from the (static) type of their argument alone
+_SHAPE_FOLDABLE_OPS = frozenset(["shape_of", "vm.shape_of", "ndarray_size"])
+
+
+def _is_constant(expr):
+    """A Constant or a Tuple of Constants, which FoldConstant evaluates as an argument."""
+    if isinstance(expr, _expr.Tuple):
+        return all(isinstance(field, _expr.Constant) for field in expr.fields)
+    return isinstance(expr, _expr.Constant)
+
+
+def _needs_fold(expr, folded):
+    """
+    Check whether fold_constant could change the part of expr built by a converter.
+    The walk stops at the expressions in folded, which have been folded already.
+    """
+    stack = [expr]
+    visited = set()
+    while stack:
+        node = stack.pop()
+        if node in visited or node in folded:
+            continue
+        visited.add(node)
+        if isinstance(node, (_expr.Var, _expr.Constant)):
+            continue
+        if isinstance(node, _expr.Call):
+            if not isinstance(node.op, tvm.ir.Op) or node.op.name in _SHAPE_FOLDABLE_OPS:
+                return True
+            if all(_is_constant(arg) for arg in node.args):
+                return True
+            stack.extend(node.args)
+        elif isinstance(node, _expr.Tuple):
+            stack.extend(node.fields)
+        elif isinstance(node, _expr.TupleGetItem) and not isinstance(node.tuple_value, _expr.Tuple):
+            stack.append(node.tuple_value)
+        else:
+            return True
+    return False
+
+
+def _fold_converted(op, folded):
+    """Fold the part of a converted op built by its converter, folded holds the op inputs."""
+    if isinstance(op, _expr.TupleWrapper):
+        if _needs_fold(op.astuple(), folded):
+            op = _expr.TupleWrapper(fold_constant(op.astuple()), len(op))
+    elif _needs_fold(op, folded):
+        op = fold_constant(op)
+    return op
+
+
+def _op_cache_key(op_name, node_inputs, op_attr):
+    """
+    The key of an op in OneflowGraph._op_cache, None if an attr can not be hashed.
+    Relay exprs hash by reference, so ops on the same inputs share the key.
+    """
+    key = (
+        op_name,
+        tuple((k, node_inputs[k]) for k in node_inputs.input_keys),
+        tuple(sorted(op_attr.items())),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _var_names(expr):
+    """
+    The names of the vars expr is computed from. During a conversion the names of every
+    converted op are kept, so only the part of expr built on top of them is walked.
+    """
+    cache = _graph_cache("input_names")
+    if cache is None:
+        return tuple(var.name_hint for var in analysis.free_vars(expr))
+    ret = cache.get(expr)
+    if ret is not None:
+        return ret
+
+    names = {}
+    stack = [expr]
+    visited = set()
+    while stack:
+        node = stack.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        known = cache.get(node)
+        if known is not None:
+            names.update(dict.fromkeys(known))
+        elif isinstance(node, _expr.Var):
+            names[node.name_hint] = None
+        elif isinstance(node, _expr.Call):
+            stack.extend(node.args)
+        elif isinstance(node, _expr.Tuple):
+            stack.extend(node.fields)
+        elif isinstance(node, _expr.TupleGetItem):
+            stack.append(node.tuple_value)
+        elif not isinstance(node, _expr.Constant):
+            # bindings, e.g. of a let, are left to free_vars
+            names.update(dict.fromkeys(var.name_hint for var in analysis.free_vars(node)))
+    ret = tuple(names)
+    cache[expr] = ret
+    return ret
+
+
+def _input_names(expr):
+    """
+    The names of the vars an op input is computed from, which the converters match on
+    to tell the data apart from the parameters.
+    """
+    if isinstance(expr, _expr.Var):
+        return expr.name_hint
+    if isinstance(expr, _expr.TupleWrapper):
+        expr = expr.astuple()
+    return " ".join(_var_names(expr))
+
+
+def _split_data_param(inputs, param_names):
+    """Split the inputs into the data, computed from "_input.", and the named parameter."""
+    data = param = None
+    for i in inputs:
+        names = _input_names(i)
+        if "_input." not in names and any(x in names for x in param_names):
+            param = i
+        else:
+            data = i
+    return data, param
+
+
 def dimension_constraint():
     def _dim_check(attrs):
         if len(attrs["kernel_size"]) in [1, 2, 3]:
@@ -170,6 +324,9 @@ def dimension_constraint():
     return _dim_check, "Only 1d, 2d and 3d kernel supported."
 
 
+_DIMENSION_CONSTRAINT = dimension_constraint()
+
+
 class OneFlowOpConverter(object):
     """A helper class for holding oneflow op converters."""
 
@@ -185,31 +342,49 @@ class OneFlowOpConverter(object):
         -------
         converter, which should be `_impl_vx`.
         """
+        # resolved once per class, cls.__dict__ keeps subclasses from sharing it
+        converter = cls.__dict__.get("_converter")
+        if converter is not None:
+            return converter
         version = 1
         if hasattr(cls, "_impl_v{}".format(version)):
-            return getattr(cls, "_impl_v{}".format(version))
+            cls._converter = getattr(cls, "_impl_v{}".format(version))
+            return cls._converter
         raise NotImplementedError("version {} of {} not implemented".format(version, cls.__name__))
 
+    # keyword arguments of the AttrCvt shared by all nodes of a converter class
+    _attr_cvt_args = None
+
+    @classmethod
+    def get_attr_cvt(cls):
+        """Get the AttrCvt of the converter class, built from _attr_cvt_args on first use."""
+        attr_cvt = cls.__dict__.get("_attr_cvt")
+        if attr_cvt is None:
+            attr_cvt = AttrCvt(op_name=cls.name, **cls._attr_cvt_args)
+            cls._attr_cvt = attr_cvt
+        return attr_cvt
+
 
 class Pool(OneFlowOpConverter):
     """A helper class for pool op converters."""
 
     name = ""
+    _attr_cvt_args = {
+        "transforms": {
+            "kernel_size": "pool_size",
+            "stride": "strides",
+            "dilations": ("dilation", 1),
+        },
+        "ignores": ("return_indices", "divisor_override"),
+        "custom_check": _DIMENSION_CONSTRAINT,
+    }
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
+        attrs = dict(attrs)
         data = inputs[0]
         attrs.pop("data_format")
-        out = AttrCvt(
-            op_name=cls.name,
-            transforms={
-                "kernel_size": "pool_size",
-                "stride": "strides",
-                "dilations": ("dilation", 1),
-            },
-            ignores=["return_indices", "divisor_override"],
-            custom_check=dimension_constraint(),
-        )([data], attrs, params)
+        out = cls.get_attr_cvt()([data], attrs, params)
 
         return out
 
@@ -235,7 +410,7 @@ class GlobalAveragePool(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        rank = len(infer_shape(inputs[0]))
+        rank = len(_cached_infer_shape(inputs[0]))
         if rank == 3:
             return _op.nn.global_avg_pool1d(inputs[0])
         if rank == 4:
@@ -253,7 +428,7 @@ class GlobalMaxPool(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        rank = len(infer_shape(inputs[0]))
+        rank = len(_cached_infer_shape(inputs[0]))
         if rank == 3:
             return _op.nn.global_max_pool1d(inputs[0])
         if rank == 4:
@@ -270,35 +445,26 @@ class Conv(OneFlowOpConverter):
     """A helper class for conv op converters."""
 
     name = ""
+    _attr_cvt_args = {
+        "transforms": {"group": ("groups", 1)},
+        "ignores": ("data_format", "filters", "padding_after", "padding_before"),
+        "custom_check": _DIMENSION_CONSTRAINT,
+    }
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
+        attrs = dict(attrs)
         # The kernel is imported from model_dir_path, without the ".weight" logo, etc.
         # The data is obtained through the graph, its op contains "_input."
-        in_names = ["_input."]
-        kernel_names = [".weight"]
-        for i in inputs:
-            IN_NAMES = any(x in str(i) for x in in_names)
-            KERNEL_NAMES = any(x in str(i) for x in kernel_names)
-            if IN_NAMES:
-                data = i
-            elif KERNEL_NAMES:
-                kernel = i
-            else:
-                data = i
-
-        # Use shape of input to determine convolution type.
-        kernel_type = infer_type(kernel)
-        kernel_shapes = [get_const_tuple(kernel_type.checked_type.shape)]
+        data, kernel = _split_data_param(inputs, [".weight"])
 
         if "kernel_size" not in attrs:
-            attrs["kernel_size"] = kernel_shapes[0][2:]
+            attrs["kernel_size"] = _cached_infer_shape(kernel)[2:]
         if "dilation_rate" in attrs:
-            attrs["dilation"] = list(attrs["dilation_rate"])
-            attrs.pop("dilation_rate")
+            attrs["dilation"] = tuple(attrs.pop("dilation_rate"))
 
-        pad_v = attrs.get("padding_before", [0, 0])
-        attrs["padding"] = [pad_v[0], pad_v[1], pad_v[0], pad_v[1]]
+        pad_v = attrs.get("padding_before", (0, 0))
+        attrs["padding"] = (pad_v[0], pad_v[1], pad_v[0], pad_v[1])
 
         group_conv1d = False
         if cls.name == "conv1d" and attrs.get("groups") != 1:
@@ -308,20 +474,13 @@ class Conv(OneFlowOpConverter):
             # Expand kernel from OIW to OIHW
             kernel = _op.expand_dims(kernel, axis=2)
             # Add new value to kernel_shape, strices, dilation, pads, if needed
-            attrs["kernel_size"] = [1] + list(attrs["kernel_size"])
+            attrs["kernel_size"] = (1,) + tuple(attrs["kernel_size"])
             if "strides" in attrs:
-                attrs["strides"] = [1] + list(attrs["strides"])
+                attrs["strides"] = (1,) + tuple(attrs["strides"])
             if "dilations" in attrs:
-                attrs["dilation"] = [1] + list(attrs["dilations"])
+                attrs["dilation"] = (1,) + tuple(attrs["dilations"])
 
-        out = AttrCvt(
-            op_name=cls.name,
-            transforms={
-                "group": ("groups", 1),
-            },
-            ignores=["data_format", "filters", "padding_after", "padding_before"],
-            custom_check=dimension_constraint(),
-        )([data, kernel], attrs, params)
+        out = cls.get_attr_cvt()([data, kernel], attrs, params)
 
         # If this was a group_conv1d, squish output back to NCW.
         if group_conv1d:
@@ -333,45 +492,31 @@ class Conv(OneFlowOpConverter):
 class ConvTranspose(OneFlowOpConverter):
     """Operator converter for ConvTranspose."""
 
+    _attr_cvt_args = {
+        "transforms": {"group": ("groups", 1)},
+        "disables": ("filters", "data_format", "padding_before"),
+        "custom_check": _DIMENSION_CONSTRAINT,
+    }
+
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        in_names = ["_input."]
-        kernel_names = [".weight"]
-        for i in inputs:
-            IN_NAMES = any(x in str(i) for x in in_names)
-            KERNEL_NAMES = any(x in str(i) for x in kernel_names)
-            if IN_NAMES:
-                data = i
-            elif KERNEL_NAMES:
-                kernel = i
-            else:
-                data = i
+        data, kernel = _split_data_param(inputs, [".weight"])
 
         # get number of channels
+        attrs = dict(attrs)
         attrs["channels"] = attrs.get("filters", 1)
         attrs["groups"] = attrs.get("group", 1)
 
-        kernel_type = infer_type(kernel)
-        kernel_shapes = [get_const_tuple(kernel_type.checked_type.shape)]
-
         if "kernel_size" not in attrs:
-            attrs["kernel_size"] = kernel_shapes[0][2:]
+            attrs["kernel_size"] = _cached_infer_shape(kernel)[2:]
 
         if "dilation_rate" in attrs:
-            attrs["dilation"] = list(attrs["dilation_rate"])
-            attrs.pop("dilation_rate")
+            attrs["dilation"] = tuple(attrs.pop("dilation_rate"))
 
-        pad_v = attrs.get("padding_before", [0, 0])
-        attrs["padding"] = [pad_v[0], pad_v[1], pad_v[0], pad_v[1]]
+        pad_v = attrs.get("padding_before", (0, 0))
+        attrs["padding"] = (pad_v[0], pad_v[1], pad_v[0], pad_v[1])
 
-        out = AttrCvt(
-            op_name=cls.name,
-            transforms={
-                "group": ("groups", 1),
-            },
-            disables=["filters", "data_format", "padding_before"],
-            custom_check=dimension_constraint(),
-        )([data, kernel], attrs, params)
+        out = cls.get_attr_cvt()([data, kernel], attrs, params)
 
         return out
 
@@ -384,7 +529,7 @@ class Upsample(OneFlowOpConverter):
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
         data = inputs[0]
-        input_shape = infer_shape(data)
+        input_shape = _cached_infer_shape(data)
         dims = len(input_shape)
 
         width_scale = attrs.get("width_scale", 1.0)
@@ -468,20 +613,21 @@ class BatchNorm(OneFlowOpConverter):
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
         # sort the inputs
-        sorted_inputs = copy.deepcopy(inputs)
+        sorted_inputs = list(inputs)
         for i in inputs:
-            IN_NAMES = "_input." in str(i)
-            if IN_NAMES:
+            names = _input_names(i)
+            if "_input." in names:
                 sorted_inputs[0] = i
-            elif "weight" in str(i) and not IN_NAMES:
+            elif "weight" in names:
                 sorted_inputs[1] = i
-            elif "bias" in str(i) and not IN_NAMES:
+            elif "bias" in names:
                 sorted_inputs[2] = i
-            elif "mean" in str(i) and not IN_NAMES:
+            elif "mean" in names:
                 sorted_inputs[3] = i
-            elif "var" in str(i) and not IN_NAMES:
+            elif "var" in names:
                 sorted_inputs[4] = i
 
+        attrs = dict(attrs)
         if "data_format" in attrs:
             if attrs["data_format"] == "channel_first":
                 attrs["axis"] = 1
@@ -497,19 +643,34 @@ class Flatten(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        axis = attrs.get("axis", 1)
-        ishape = _op.shape_of(inputs[0])
-        ndim = infer_shape(ishape)[0]
-        if axis < 0:
-            axis = axis + ndim
-
-        if axis == 1:
+        ttype = _cached_infer_type(inputs[0]).checked_type
+        ndim = len(ttype.shape)
+        # the dims from start_dim to end_dim, both included, are flattened into one
+        start_dim = attrs.get("start_dim", 1)
+        end_dim = attrs.get("end_dim", -1)
+        if start_dim < 0:
+            start_dim += ndim
+        if end_dim < 0:
+            end_dim += ndim
+
+        if start_dim == 1 and end_dim == ndim - 1:
             out = _op.nn.batch_flatten(inputs[0])
+        elif not _ty.is_dynamic(ttype):
+            # a static shape gives the target shape without computing it in the graph
+            dims = [int(dim) for dim in ttype.shape]
+            flat_dim = int(np.prod(dims[start_dim : end_dim + 1]))
+            out = _op.reshape(inputs[0], dims[:start_dim] + [flat_dim] + dims[end_dim + 1 :])
         else:
-            pre_shape = _op.prod(_op.strided_slice(ishape, [0], [axis], [1]), keepdims=True)
-            post_shape = _op.prod(_op.strided_slice(ishape, [axis], [ndim], [1]), keepdims=True)
-            newshape = _op.concatenate([pre_shape, post_shape], axis=0)
-            out = _op.reshape(inputs[0], newshape)
+            ishape = _op.shape_of(inputs[0])
+            flat_shape = _op.prod(
+                _op.strided_slice(ishape, [start_dim], [end_dim + 1], [1]), keepdims=True
+            )
+            newshape = [flat_shape]
+            if start_dim > 0:
+                newshape.insert(0, _op.strided_slice(ishape, [0], [start_dim], [1]))
+            if end_dim < ndim - 1:
+                newshape.append(_op.strided_slice(ishape, [end_dim + 1], [ndim], [1]))
+            out = _op.reshape(inputs[0], _op.concatenate(newshape, axis=0))
         return out
 
 
@@ -520,17 +681,10 @@ class MatMul(OneFlowOpConverter):
     def _impl_v1(cls, inputs, attrs, params):
         assert len(inputs) == 2, "Gemm op take 2 inputs, {} given".format(len(inputs))
         # Similar to 'class Conv'
-        true_names = ["weight"]
-        false_names = ["_input."]
-        for i in inputs:
-            T_NAMES = any(x in str(i) for x in true_names)
-            F_NAMES = any(x in str(i) for x in false_names)
-            if T_NAMES and not F_NAMES:
-                matmul_b = i
-            else:
-                matmul_a = i
+        matmul_a, matmul_b = _split_data_param(inputs, ["weight"])
 
-        dtype = infer_type(matmul_a).checked_type.dtype
+        a_type = _cached_infer_type(matmul_a).checked_type
+        dtype = a_type.dtype
 
         # Y = alpha * A * B
         alpha = float(attrs.get("alpha", 1.0))
@@ -538,12 +692,15 @@ class MatMul(OneFlowOpConverter):
         transB = bool(attrs.get("transpose_b", False))
 
         # get number of channels
-        channels = infer_channels(matmul_b, not transB)
+        b_shape = _cached_infer_shape(matmul_b)
+        channels = b_shape[0] if transB else b_shape[1]
         if transA:
             matmul_a = _op.transpose(matmul_a, axes=(1, 0))
         if not transB:
             matmul_b = _op.transpose(matmul_b, axes=(1, 0))
-        matmul_a = _op.nn.batch_flatten(matmul_a)
+        # A 2-D operand is already in the layout dense expects
+        if len(a_type.shape) != 2:
+            matmul_a = _op.nn.batch_flatten(matmul_a)
         if alpha != 1.0:
             matmul_a *= _expr.const(alpha, dtype=dtype)
 
@@ -606,22 +763,13 @@ class Add(OneFlowOpConverter):
         assert len(inputs) == 2, "Math op {} take 2 inputs, {} given".format(cls.name, len(inputs))
         axis = int(attrs.get("axis", 0))
 
-        true_names = ["weight", "bias"]
-        false_names = ["_input."]
-
-        for i in inputs:
-            T_NAMES = any(x in str(i) for x in true_names)
-            F_NAMES = any(x in str(i) for x in false_names)
-            if T_NAMES and not F_NAMES:
-                add_b = i
-            else:
-                add_a = i
+        add_a, add_b = _split_data_param(inputs, ["weight", "bias"])
 
         # fix the shape
-        add_shape = infer_shape(add_a)
+        add_shape = _cached_infer_shape(add_a)
         if len(add_shape) > 2:
             add_b = _op.expand_dims(add_b, axis=axis, num_newaxis=len(add_shape) - 2)
-        add_b_shape = list(infer_shape(add_b))
+        add_b_shape = list(_cached_infer_shape(add_b))
         add_b_shape.insert(0, add_shape[0])
 
         add_b = _op.reshape(add_b, tuple(add_b_shape))
@@ -635,7 +783,7 @@ class Expand(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        input_shape = infer_shape(inputs[0])
+        input_shape = _cached_infer_shape(inputs[0])
         assert input_shape == attrs["in_shape"], "shape wrong"
 
         new_shape = attrs["out_shape"]
@@ -662,32 +810,24 @@ class BroadcastMath(OneFlowOpConverter):
     def _impl_v1(cls, inputs, attrs, params):
         assert len(inputs) == 2, "Math op {} take 2 inputs, {} given".format(cls.name, len(inputs))
         beta_names = ["weight", "bias", "mean", "var", "Constant"]
+        # print each input once, both checks below match on the text
+        input_strs = [str(i) for i in inputs]
 
-        for i in inputs:
-            T_NAMES = any([x in str(i) for x in beta_names])
-            if T_NAMES and "_input." not in str(i):
+        for i, i_str in zip(inputs, input_strs):
+            T_NAMES = any([x in i_str for x in beta_names])
+            if T_NAMES and "_input." not in i_str:
                 input_b = i
             else:
                 input_a = i
 
-        if cls.name == "divide":
-            length = []
-            for i in inputs:
-                length.append(len(str(i)))
-            for i in inputs:
-                if len(str(i)) == max(length):
+        if cls.name in ("divide", "subtract"):
+            # the longer expression is the dividend of divide and the subtrahend of subtract
+            max_len = max(len(i_str) for i_str in input_strs)
+            for i, i_str in zip(inputs, input_strs):
+                if (len(i_str) == max_len) == (cls.name == "divide"):
                     input_a = i
                 else:
                     input_b = i
-        if cls.name == "subtract":
-            length = []
-            for i in inputs:
-                length.append(len(str(i)))
-            for i in inputs:
-                if len(str(i)) == max(length):
-                    input_b = i
-                else:
-                    input_a = i
         try:
             return get_relay_op(cls.name)(input_a, input_b)
         except UnboundLocalError:
@@ -768,10 +908,12 @@ class AddN(OneFlowOpConverter):
     def _impl_v1(cls, inputs, attrs, params):
         assert len(inputs) > 0, "add_n take >=1 inputs, but 0 given."
 
-        res = inputs[0]
-        for each in inputs[1:]:
-            res = _op.add(res, each)
-        return res
+        # add pairwise, so the sum is a tree of depth log(n) rather than a chain of n adds
+        res = list(inputs)
+        while len(res) > 1:
+            pairs = [_op.add(res[i], res[i + 1]) for i in range(0, len(res) - 1, 2)]
+            res = pairs + res[len(pairs) * 2 :]
+        return res[0]
 
 
 class ScalarAdd(OneFlowOpConverter):
@@ -857,15 +999,9 @@ class Softmax(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        axis = attrs.get("axis", 1)
-        ndim = len(infer_shape(inputs[0]))
-        if axis < 0:
-            axis += ndim
-        axes = list(range(axis, ndim))
-        x = inputs[0]
-        m = _op.max(x, axes, keepdims=True)
-        e = _op.exp(x - m)
-        return e / _op.sum(e, axes, keepdims=True)
+        # the softmax op of oneflow has no axis attr and normalizes over the last dim,
+        # other dims are moved there by transposes in the graph
+        return _op.nn.softmax(inputs[0], axis=attrs.get("axis", -1))
 
 
 class LogSoftmax(OneFlowOpConverter):
@@ -873,16 +1009,9 @@ class LogSoftmax(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        axis = attrs.get("axis", 1)
-        ndim = len(infer_shape(inputs[0]))
-        if axis < 0:
-            axis += ndim
-        axes = list(range(axis, ndim))
-        x = inputs[0]
-        m = _op.max(x, axes, keepdims=True)
-        e = _op.exp(x - m)
-        s = _op.sum(e, axes, keepdims=True)
-        return x - m - _op.log(s)
+        # the log_softmax op of oneflow has no axis attr and normalizes over the last dim,
+        # other dims are moved there by transposes in the graph
+        return _op.nn.log_softmax(inputs[0], axis=attrs.get("axis", -1))
 
 
 class Dropout(OneFlowOpConverter):
@@ -900,8 +1029,9 @@ class ThresholdedRelu(OneFlowOpConverter):
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
         alpha = float(attrs.get("alpha", 1.0))
-        alpha_tensor = _op.full_like(inputs[0], fill_value=_expr.const(alpha))
-        mask = _op.greater(inputs[0], alpha_tensor).astype("float32")
+        dtype = _cached_infer_type(inputs[0]).checked_type.dtype
+        # the scalar broadcasts in greater, no need to fill a tensor with it
+        mask = _op.greater(inputs[0], _expr.const(alpha, dtype=dtype)).astype("float32")
         return inputs[0] * mask
 
 
@@ -911,9 +1041,12 @@ class Elu(OneFlowOpConverter):
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
         alpha = float(attrs.get("alpha", 1.0))
-        return _expr.const(-alpha) * _op.nn.relu(
-            _expr.const(1.0) - _op.exp(inputs[0])
-        ) + _op.nn.relu(inputs[0])
+        data = inputs[0]
+        return _op.where(
+            _op.greater(data, _expr.const(0.0)),
+            data,
+            _expr.const(alpha) * (_op.exp(data) - _expr.const(1.0)),
+        )
 
 
 class PReLU(OneFlowOpConverter):
@@ -923,11 +1056,17 @@ class PReLU(OneFlowOpConverter):
     def _impl_v1(cls, inputs, attrs, params):
         assert len(inputs) == 2, "PReLU need 2 inputs, but {} given".format(len(inputs))
         for i in inputs:
-            if "_input." in str(i):
+            if "_input." in _input_names(i):
                 prelu_a = i
             else:
                 prelu_b = i
 
+        # a per channel alpha maps onto prelu directly, keeping the layout of the input
+        alpha_shape = _cached_infer_shape(prelu_b)
+        data_shape = _cached_infer_shape(prelu_a)
+        if len(alpha_shape) == 1 and len(data_shape) > 1 and alpha_shape[0] == data_shape[1]:
+            return _op.nn.prelu(prelu_a, prelu_b, axis=1)
+
         input_shape = shape_of(prelu_a)
         alpha = _op.broadcast_to_like(prelu_b, prelu_a)
         alpha = _op.reshape(alpha, [-1])
@@ -944,9 +1083,11 @@ class Selu(OneFlowOpConverter):
     def _impl_v1(cls, inputs, attrs, params):
         alpha = float(attrs.get("alpha", 1.67326319217681884765625))
         gamma = float(attrs.get("gamma", 1.05070102214813232421875))
-        return _expr.const(gamma) * (
-            _expr.const(-alpha) * _op.nn.relu(_expr.const(1.0) - _op.exp(inputs[0]))
-            + _op.nn.relu(inputs[0])
+        data = inputs[0]
+        return _expr.const(gamma) * _op.where(
+            _op.greater(data, _expr.const(0.0)),
+            data,
+            _expr.const(alpha) * (_op.exp(data) - _expr.const(1.0)),
         )
 
 
@@ -987,7 +1128,7 @@ class Softplus(OneFlowOpConverter):
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
         data = inputs[0]
-        data_dtype = infer_type(data).checked_type.dtype
+        data_dtype = _cached_infer_type(data).checked_type.dtype
         data = _op.exp(data) + _expr.const(1, dtype=data_dtype)
         return _op.log(data)
 
@@ -1005,6 +1146,7 @@ class Concat(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
+        attrs = dict(attrs)
         attrs.pop("max_dim_size")
         inputs = _dtype_shape_promotion(inputs)
         return _op.concatenate(inputs, axis=attrs["axis"])
@@ -1016,12 +1158,12 @@ class Clip(OneFlowOpConverter):
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
         attr = {}
-        dtype = infer_type(inputs[0])
+        dtype = _cached_infer_type(inputs[0]).checked_type.dtype
 
-        if "float" in str(dtype):
+        if "float" in dtype:
             attr["a_min"] = attrs["floating_min"]
             attr["a_max"] = attrs["floating_max"]
-        elif "int" in str(dtype):
+        elif "int" in dtype:
             attr["a_min"] = attrs["integral_min"]
             attr["a_max"] = attrs["integral_max"]
         else:
@@ -1037,10 +1179,8 @@ class Slice(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        starts = list(attrs["start"])
-        ends = list(attrs["stop"])
-        steps = list(attrs["step"])
-        return _op.strided_slice(inputs[0], starts, ends, steps)
+        # parse_attr already gives tuples, which strided_slice takes as they are
+        return _op.strided_slice(inputs[0], attrs["start"], attrs["stop"], attrs["step"])
 
 
 class Split(OneFlowOpConverter):
@@ -1049,13 +1189,10 @@ class Split(OneFlowOpConverter):
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
         splits = attrs.get("split", None)
-        if splits is not None:
-            indices = []
-            attrs["indices_or_sections"] = []
-            index = 0
-            for i in splits[:-1]:
-                index += i
-                indices.append(index)
+        if splits is None:
+            raise AttributeError("split of Split should be given")
+        # the split points are the running sums of the section sizes
+        indices = np.cumsum(splits[:-1]).tolist()
         output = _op.split(inputs[0], indices, attrs.get("axis", 0))
         # If the output of split is a single value, unpack if from the TupleWrapper
         if len(output) == 1:
@@ -1077,10 +1214,19 @@ class Unsqueeze(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
+        data = inputs[0]
         axes = sorted(attrs["axes"])
+        ttype = _cached_infer_type(data).checked_type
+        if not _ty.is_dynamic(ttype) and all(axis >= 0 for axis in axes):
+            # insert all the new axes with one reshape
+            newshape = [int(dim) for dim in ttype.shape]
+            for axis in axes:
+                newshape.insert(axis, 1)
+            return _op.reshape(data, newshape)
+
         for axis in axes:
-            inputs[0] = _op.expand_dims(inputs[0], axis=axis, num_newaxis=1)
-        return inputs[0]
+            data = _op.expand_dims(data, axis=axis, num_newaxis=1)
+        return data
 
 
 class Sign(OneFlowOpConverter):
@@ -1096,7 +1242,7 @@ class Reciprocal(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        dtype = infer_type(inputs[0]).checked_type.dtype
+        dtype = _cached_infer_type(inputs[0]).checked_type.dtype
         return _expr.const(1.0, dtype=dtype) / inputs[0]
 
 
@@ -1135,12 +1281,12 @@ class OneHot(OneFlowOpConverter):
     def _impl_v1(cls, inputs, attrs, params):
         # Extract relay one_hot inputs.
         indices, depth, values = inputs
-        ndim = len(infer_shape(indices))
+        ndim = len(_cached_infer_shape(indices))
         # Split onnx on off values into two separate expressions.
         off_value, on_value = _op.take(values, _op.const(0)), _op.take(values, _op.const(1))
         # Extract the datatype of the output from on_value.
-        dtype = infer_type(on_value).checked_type.dtype
-        ind_dtype = infer_type(indices).checked_type.dtype
+        dtype = _cached_infer_type(on_value).checked_type.dtype
+        ind_dtype = _cached_infer_type(indices).checked_type.dtype
         # Normalize the indices to a positive range
         indices = _op.where(
             indices < _op.const(0, ind_dtype), indices + _op.cast(depth, ind_dtype), indices
@@ -1158,23 +1304,28 @@ class Where(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        condition_rank = len(infer_shape(inputs[0]))
-        x_rank = len(infer_shape(inputs[1]))
-        y_rank = len(infer_shape(inputs[2]))
+        condition_rank = len(_cached_infer_shape(inputs[0]))
+        x_rank = len(_cached_infer_shape(inputs[1]))
+        y_rank = len(_cached_infer_shape(inputs[2]))
         ranks = [condition_rank, x_rank, y_rank]
 
         # If one rank is longer than others, then we can broadcast
         # to that shape.
         max_rank = max(ranks)
         max_rank_idxs = [i for i, x in enumerate(ranks) if x == max_rank]
-        broadcast_shape = shape_of(inputs[max_rank_idxs[0]])
+        shapes = [shape_of(inputs[idx]) for idx in max_rank_idxs]
         # If two or more inputs have the same rank, compute the broadcast
         # shape by taking the maximum value of each dimensions.
-        if len(max_rank_idxs) > 1:
-            for idx in max_rank_idxs:
-                broadcast_shape = _op.maximum(broadcast_shape, shape_of(inputs[idx]))
-
-        broadcast_shape = fold_constant(broadcast_shape)
+        if all(isinstance(shape, _expr.Constant) for shape in shapes):
+            # static shapes, no relay expression needs to be built and folded
+            broadcast_shape = _expr.const(
+                np.maximum.reduce([shape.data.numpy() for shape in shapes]), "int64"
+            )
+        else:
+            broadcast_shape = shapes[0]
+            for shape in shapes[1:]:
+                broadcast_shape = _op.maximum(broadcast_shape, shape)
+            broadcast_shape = fold_constant(broadcast_shape)
 
         condition = _op.broadcast_to(inputs[0], broadcast_shape)
         x = _op.broadcast_to(inputs[1], broadcast_shape)
@@ -1223,97 +1374,101 @@ class Cast(OneFlowOpConverter):
 
     @classmethod
     def _impl_v1(cls, inputs, attrs, params):
-        attrs["dtype"] = infer_type(inputs[0]).checked_type.dtype
+        attrs["dtype"] = _cached_infer_type(inputs[0]).checked_type.dtype
         return AttrCvt(op_name="cast")(inputs, attrs)
 
 
+# supported oneflow2relay op, built once when the module is imported
+_CONVERT_MAP = {
+    # defs/math
+    "bias_add": Add.get_converter(),
+    "scalar_add": ScalarAdd.get_converter(),
+    "scalar_mul": ScalarMul.get_converter(),
+    "scalar_pow": ScalarPow.get_converter(),
+    "reduce_sum": ReduceSum.get_converter(),
+    "reduce_max": ReduceMax.get_converter(),
+    "reduce_min": ReduceMin.get_converter(),
+    "reduce_mean": ReduceMean.get_converter(),
+    "broadcast_add": BroadcastAdd.get_converter(),
+    "broadcast_mul": BroadcastMul.get_converter(),
+    "broadcast_sub": BroadcastSub.get_converter(),
+    "broadcast_div": BroadcastDiv.get_converter(),
+    "broadcast_greater": Greater.get_converter(),
+    "log": Renamer("log"),
+    "log1p": Log1p.get_converter(),
+    "acos": Renamer("acos"),
+    "acosh": Renamer("acosh"),
+    "asin": Renamer("asin"),
+    "asinh": Renamer("asinh"),
+    "atan": Renamer("atan"),
+    "atanh": Renamer("atanh"),
+    "cos": Renamer("cos"),
+    "cosh": Renamer("cosh"),
+    "sin": Renamer("sin"),
+    "sinh": Renamer("sinh"),
+    "tan": Renamer("tan"),
+    "tanh": Renamer("tanh"),
+    "pow": Renamer("power"),
+    "exp": Renamer("exp"),
+    "expm1": Expm1.get_converter(),
+    "floor": Renamer("floor"),
+    "ceil": Renamer("ceil"),
+    "round": Renamer("round"),
+    "add_n": AddN.get_converter(),
+    "sqrt": Renamer("sqrt"),
+    "rsqrt": Renamer("rsqrt"),
+    "square": Square.get_converter(),
+    "sign": Sign.get_converter(),
+    "erf": Erf.get_converter(),
+    "erfc": Erfc.get_converter(),
+    "reciprocal_no_nan": Reciprocal.get_converter(),
+    # defs/activation
+    "softmax": Softmax.get_converter(),
+    "softsign": Softsign.get_converter(),
+    "hardtanh": HardTanh.get_converter(),
+    "relu": Renamer("relu"),
+    "leaky_relu": Renamer("leaky_relu"),
+    "prelu": PReLU.get_converter(),
+    "elu": Elu.get_converter(),
+    "selu": Selu.get_converter(),
+    "silu": Silu.get_converter(),
+    "gelu": Gelu.get_converter(),
+    # defs/nn
+    "conv2d": Conv2d.get_converter(),
+    "deconv2d": ConvTranspose2d.get_converter(),
+    "maxpool_2d": MaxPool2d.get_converter(),
+    "avgpool_2d": AveragePool2d.get_converter(),
+    "adaptive_avg_pool2d": AdaptiveAvgPool2d.get_converter(),
+    "adaptive_max_pool2d": AdaptiveMaxPool2d.get_converter(),
+    "dropout": Dropout.get_converter(),
+    "normalization": BatchNorm.get_converter(),
+    "upsample_nearest_2d": UpsampleNearest.get_converter(),
+    "upsample_bilinear_2d": UpsampleBiLinear.get_converter(),
+    # defs/tensor
+    "matmul": MatMul.get_converter(),
+    "concat": Concat.get_converter(),
+    "clip_by_scalar": Clip.get_converter(),
+    "slice": Slice.get_converter(),
+    "expand": Expand.get_converter(),
+    "transpose": AttrCvt("transpose", {"perm": "axes"}),
+    "expand_dims": ExpandDim.get_converter(),
+    "range": Range.get_converter(),
+    "cast": Cast.get_converter(),
+    # defs/others
+    "reshape": Reshape.get_converter(),
+    "constant": Constant.get_converter(),
+    # "where": Where.get_converter(),
+    "flatten": Flatten.get_converter(),
+    "sigmoid": Renamer("sigmoid"),
+    "sigmoid_v2": Renamer("sigmoid"),
+    "hardsigmoid": HardSigmoid.get_converter(),
+    "squeeze": AttrCvt("squeeze", {"axes": "axis"}),
+    "unsqueeze": Unsqueeze.get_converter(),
+}
+
+
 def get_convert_map():
-    # supported oneflow2relay op
-    return {
-        # defs/math
-        "bias_add": Add.get_converter(),
-        "scalar_add": ScalarAdd.get_converter(),
-        "scalar_mul": ScalarMul.get_converter(),
-        "scalar_pow": ScalarPow.get_converter(),
-        "reduce_sum": ReduceSum.get_converter(),
-        "reduce_max": ReduceMax.get_converter(),
-        "reduce_min": ReduceMin.get_converter(),
-        "reduce_mean": ReduceMean.get_converter(),
-        "broadcast_add": BroadcastAdd.get_converter(),
-        "broadcast_mul": BroadcastMul.get_converter(),
-        "broadcast_sub": BroadcastSub.get_converter(),
-        "broadcast_div": BroadcastDiv.get_converter(),
-        "broadcast_greater": Greater.get_converter(),
-        "log": Renamer("log"),
-        "log1p": Log1p.get_converter(),
-        "acos": Renamer("acos"),
-        "acosh": Renamer("acosh"),
-        "asin": Renamer("asin"),
-        "asinh": Renamer("asinh"),
-        "atan": Renamer("atan"),
-        "atanh": Renamer("atanh"),
-        "cos": Renamer("cos"),
-        "cosh": Renamer("cosh"),
-        "sin": Renamer("sin"),
-        "sinh": Renamer("sinh"),
-        "tan": Renamer("tan"),
-        "tanh": Renamer("tanh"),
-        "pow": Renamer("power"),
-        "exp": Renamer("exp"),
-        "expm1": Expm1.get_converter(),
-        "floor": Renamer("floor"),
-        "ceil": Renamer("ceil"),
-        "round": Renamer("round"),
-        "add_n": AddN.get_converter(),
-        "sqrt": Renamer("sqrt"),
-        "rsqrt": Renamer("rsqrt"),
-        "square": Square.get_converter(),
-        "sign": Sign.get_converter(),
-        "erf": Erf.get_converter(),
-        "erfc": Erfc.get_converter(),
-        "reciprocal_no_nan": Reciprocal.get_converter(),
-        # defs/activation
-        "softmax": Softmax.get_converter(),
-        "softsign": Softsign.get_converter(),
-        "hardtanh": HardTanh.get_converter(),
-        "relu": Renamer("relu"),
-        "leaky_relu": Renamer("leaky_relu"),
-        "prelu": PReLU.get_converter(),
-        "selu": Selu.get_converter(),
-        "silu": Silu.get_converter(),
-        "gelu": Gelu.get_converter(),
-        # defs/nn
-        "conv2d": Conv2d.get_converter(),
-        "deconv2d": ConvTranspose2d.get_converter(),
-        "maxpool_2d": MaxPool2d.get_converter(),
-        "avgpool_2d": AveragePool2d.get_converter(),
-        "adaptive_avg_pool2d": AdaptiveAvgPool2d.get_converter(),
-        "adaptive_max_pool2d": AdaptiveMaxPool2d.get_converter(),
-        "dropout": Dropout.get_converter(),
-        "normalization": BatchNorm.get_converter(),
-        "upsample_nearest_2d": UpsampleNearest.get_converter(),
-        "upsample_bilinear_2d": UpsampleBiLinear.get_converter(),
-        # defs/tensor
-        "matmul": MatMul.get_converter(),
-        "concat": Concat.get_converter(),
-        "clip_by_scalar": Clip.get_converter(),
-        "slice": Slice.get_converter(),
-        "expand": Expand.get_converter(),
-        "transpose": AttrCvt("transpose", {"perm": "axes"}),
-        "expand_dims": ExpandDim.get_converter(),
-        "range": Range.get_converter(),
-        "cast": Cast.get_converter(),
-        # defs/others
-        "reshape": Reshape.get_converter(),
-        "constant": Constant.get_converter(),
-        # "where": Where.get_converter(),
-        "flatten": Flatten.get_converter(),
-        "sigmoid": Renamer("sigmoid"),
-        "sigmoid_v2": Renamer("sigmoid"),
-        "hardsigmoid": HardSigmoid.get_converter(),
-        "squeeze": AttrCvt("squeeze", {"axes": "axis"}),
-        "unsqueeze": Unsqueeze.get_converter(),
-    }
+    return _CONVERT_MAP
 
 
 class oneflow_input(object):
@@ -1321,10 +1476,13 @@ class oneflow_input(object):
     Dual purpose list or dictionary access object
     """
 
+    # one is built for every converted node
+    __slots__ = ("input_keys", "input_dict")
+
     def __init__(self):
+        # the keys keep repeated inputs, e.g. both operands of x * x
         self.input_keys = []
         self.input_dict = {}
-        self.n = 0
 
     def __getitem__(self, item):
         if isinstance(item, int):
@@ -1332,7 +1490,7 @@ class oneflow_input(object):
                 return None
             return self.input_dict[self.input_keys[item]]
         if isinstance(item, str):
-            if item not in self.input_keys:
+            if item not in self.input_dict:
                 return None
             return self.input_dict[item]
         if isinstance(item, slice):
@@ -1357,16 +1515,7 @@ class oneflow_input(object):
         return len(self.input_keys)
 
     def __iter__(self):
-        self.n = 0
-        return self
-
-    def __next__(self):
-        if self.n < len(self.input_keys):
-            output = self.input_dict[self.input_keys[self.n]]
-            self.n += 1
-            return output
-
-        raise StopIteration
+        return (self.input_dict[key] for key in self.input_keys)
 
 
 def deal_with_input_convert(
@@ -1391,29 +1540,26 @@ def deal_with_input_convert(
                 if k in _nodes:
                     node_replace = k
             if node_replace is not None:
-                op_replace = copy.deepcopy(_nodes[node_replace])
-                _nodes[node_input] = op_replace
+                # share the expression, a copy would carry its own copies of the vars
+                _nodes[node_input] = _nodes[node_replace]
             else:
-                print("{} will not be in _nodes".format(node_input))
+                logger.debug("%s will not be in _nodes", node_input)
 
 
-def deal_parameter_convert(
-    node_input_paths, model_dir_path, _input_path_2_name, _model_array, _params, _nodes
-):
+def deal_parameter_convert(node_input_paths, _input_path_2_name, _path_2_layer, _params, _nodes):
     """deal with parameter(weight) convert in oneflow."""
-    for node_input_path in node_input_paths:
-        node_path = os.path.join(model_dir_path, node_input_path.replace("m.", ""))
-        node_input_name = node_input_path.split("/")[0]
-        _input_path_2_name[node_path] = node_input_name
-        for param_name in _model_array:
-            node_p = _model_array[param_name]
-            if node_path == node_p["path"]:
-                node_array = node_p["params"]
-                _params[node_input_name] = node_array
-                _nodes[node_input_name] = new_var(
-                    node_input_name, shape=node_array.shape, dtype=str(node_array.dtype)
-                )
-                break
+    for node_input_name, node_path in node_input_paths:
+        # every name the path is consumed under, in the order they are met
+        names = _input_path_2_name.setdefault(node_path, [])
+        if node_input_name not in names:
+            names.append(node_input_name)
+        layer = _path_2_layer.get(node_path)
+        if layer is not None:
+            _, node_array, node_dtype = layer
+            _params[node_input_name] = node_array
+            _nodes[node_input_name] = new_var(
+                node_input_name, shape=node_array.shape, dtype=node_dtype
+            )
 
 
 class OneflowGraph(object):
@@ -1442,57 +1588,67 @@ class OneflowGraph(object):
         self._num_param = 0
         self._input_names = []
         self._model_array = {}
+        self._path_2_layer = {}
+        self._graph_paths = {}
         self._input_path_2_name = {}
         self._output_path_2_name = {}
+        self._node_input_paths = {}
+        self._node_output_paths = {}
+        self._op_cache = {}
+        self._infer_type_cache = {}
+        self._input_names_cache = {}
+        self._node_types = {}
         self._init_variable_node = []
         self._shape = shape
         self._dtype = dtype
-        self._identity_list = []
-        self._sort_inputs = {}
+        self._identity_set = set()
 
-        import oneflow
+        oneflow = _get_oneflow()
+        # os.path.join(model_dir_path, p) for the relative paths of the graph, joined once
+        self._path_prefix = os.path.join(model_dir_path, "")
 
         model = oneflow.load(model_dir_path)
-        # model_array: keys: layer_name，values: dict('path', 'params')
+        # model_array: keys: layer_name，values: dict('path', 'params', 'dtype')
         for layer_name in model:
             layer = model[layer_name]
             layer_node = {}
-            layer_node["path"] = os.path.join(model_dir_path, layer_name, "out")  # get path
+            layer_node["path"] = self._path_prefix + layer_name + os.sep + "out"  # get path
             if "System-Train" in layer_name:
                 continue
             node_name = "m." + layer_name
             shape = self._shape[node_name]
-            dtype = self._dtype[node_name]
             array = layer.detach().cpu().numpy()
-            layer_node["params"] = array.reshape(shape)
+            if array.shape != shape:
+                array = array.reshape(shape)
+            layer_node["params"] = array
+            # the dtype string is built once here and reused by every new_var of the layer
+            layer_node["dtype"] = array.dtype.name
             self._model_array[layer_name] = layer_node
-
-        for node_name in nodes:
-            node = nodes[node_name]
-            if is_user_op(node):
-                for input_name in node.user_conf.input:
-                    node_input_paths = getattr(node.user_conf.input[input_name], "s")
-                    deal_parameter_convert(
-                        node_input_paths,
-                        model_dir_path,
-                        self._input_path_2_name,
-                        self._model_array,
-                        self._params,
-                        self._nodes,
-                    )
-                for output_name in node.user_conf.output:
-                    node_output_paths = getattr(node.user_conf.output[output_name], "s")
-                    for node_output_path in node_output_paths:
-                        node_path = os.path.join(model_dir_path, node_output_path.replace("m.", ""))
-                        node_output_name = node_output_path.split("/")[0]
-                        self._output_path_2_name[node_path] = node_output_name
-            elif is_output_op(node):
-                node_output_path = getattr(node.output_conf, "in")
-                output_path = os.path.join(
-                    model_dir_path, getattr(node.output_conf, "in").replace("m.", "")
+        # path -> (layer_name, params, dtype), so that parameters are matched with one lookup
+        self._path_2_layer = {
+            v["path"]: (k, v["params"], v["dtype"]) for k, v in self._model_array.items()
+        }
+
+        # the op type of each node is looked up once here and kept for from_oneflow
+        self._graph_nodes = nodes
+        for node_name, node in nodes.items():
+            op_type = node.WhichOneof("op_type")
+            self._node_types.setdefault(op_type, []).append((node_name, node))
+            if op_type == "user_conf":
+                deal_parameter_convert(
+                    self._node_inputs(node),
+                    self._input_path_2_name,
+                    self._path_2_layer,
+                    self._params,
+                    self._nodes,
                 )
+                # resolved output paths, reused when the op is converted
+                self._node_outputs(node)
+            elif op_type == "output_conf":
+                node_output_path = getattr(node.output_conf, "in")
+                output_path = self._graph_path(node_output_path)
                 self._output_path_2_name[output_path] = node_name
-            elif is_param_op(node):
+            elif op_type == "variable_conf":
                 if "FreeEagerTensor" in node.name:
                     shape = tuple(node.variable_conf.shape.dim)
                     dtype = FLOW_2_STR_DTYPE[node.variable_conf.data_type]
@@ -1500,24 +1656,51 @@ class OneflowGraph(object):
                     self._dtype[node.name] = dtype
                     self._init_variable_node.append(node.name)
         if self._init_variable_node != []:
-            print("{} should be defined by user".format(self._init_variable_node))
+            logger.warning("%s should be defined by user", self._init_variable_node)
+
+    def _graph_path(self, path):
+        """Get the file path of a graph path in the model dir, built once per graph path."""
+        node_path = self._graph_paths.get(path)
+        if node_path is None:
+            node_path = self._path_prefix + path.replace("m.", "")
+            self._graph_paths[path] = node_path
+        return node_path
+
+    def _node_inputs(self, node):
+        """Get the (name, file path) of every input of a user op, read from the proto once."""
+        node_inputs = self._node_input_paths.get(node.name)
+        if node_inputs is None:
+            node_inputs = [
+                (path.split("/")[0], self._graph_path(path))
+                for input_blob in node.user_conf.input.values()
+                for path in input_blob.s
+            ]
+            self._node_input_paths[node.name] = node_inputs
+        return node_inputs
+
+    def _node_outputs(self, node):
+        """Get the file paths of the outputs of a user op, read from the proto once."""
+        output_paths = self._node_output_paths.get(node.name)
+        if output_paths is None:
+            output_paths = []
+            for node_output in node.user_conf.output.values():
+                for node_output_path in node_output.s:
+                    node_path = self._graph_path(node_output_path)
+                    self._output_path_2_name[node_path] = node_output_path.split("/")[0]
+                    output_paths.append(node_path)
+            self._node_output_paths[node.name] = output_paths
+        return output_paths
 
     def _parse_input(self, node, model_dir_path):
-        for input_name in node.user_conf.input:
-            node_input_paths = getattr(node.user_conf.input[input_name], "s")
-            for i in node_input_paths:
-                node_input = i.split("/")[0]
-                node_input_shape = self._shape[node_input]
-                node_input_dtype = self._dtype[node_input]
-                node_path = os.path.join(model_dir_path, i.replace("m.", ""))
-                deal_with_input_convert(
-                    node_input,
-                    node_input_shape,
-                    node_input_dtype,
-                    node_path,
-                    self._nodes,
-                    self._input_path_2_name,
-                )
+        for node_input, node_path in self._node_inputs(node):
+            deal_with_input_convert(
+                node_input,
+                self._shape[node_input],
+                self._dtype[node_input],
+                node_path,
+                self._nodes,
+                self._input_path_2_name,
+            )
 
     def _parse_output(self, op_name, outputs, cnt_init=0):
         """
@@ -1544,7 +1727,8 @@ class OneflowGraph(object):
             outputs = [self._init_variable_node[cnt_init]]
 
         if len(outputs) > 1:
-            outputs = list(set(outputs))
+            # keep the order, the outputs are paired with the op outputs by position
+            outputs = list(dict.fromkeys(outputs))
 
         return outputs
 
@@ -1599,20 +1783,22 @@ class OneflowGraph(object):
                 )
                 self._inputs[node_init_name] = self._nodes[node_init_name]
 
+        # classify the nodes once, the following steps only visit the kinds they need
+        if nodes is self._graph_nodes:
+            node_types = self._node_types
+        else:
+            node_types = get_nodes_by_type(nodes)
+        user_nodes = node_types.get("user_conf", [])
+        output_nodes = node_types.get("output_conf", [])
+
         # step 2: find out if unsupported ops are used
-        convert_map = get_convert_map()
-        unsupported_ops = set()
-        for node_name in nodes:
-            node = nodes[node_name]
-            if is_user_op(node):
-                # op names, not the layer names
-                op_name = node.user_conf.op_type_name
-                if (
-                    op_name not in convert_map
-                    and "constant" not in op_name
-                    and op_name not in self._identity_list
-                ):
-                    unsupported_ops.add(op_name)
+        # op names, not the layer names
+        op_names = {node.user_conf.op_type_name for _, node in user_nodes}
+        unsupported_ops = {
+            op_name
+            for op_name in op_names.difference(get_convert_map(), self._identity_set)
+            if "constant" not in op_name
+        }
         # find out the unsupported op
         if unsupported_ops:
             msg = "The following operators are not supported for frontend OneFlow: "
@@ -1620,9 +1806,8 @@ class OneflowGraph(object):
             raise tvm.error.OpNotImplemented(msg)
 
         # step 3: convert op
-        for node_name in nodes:
-            node = nodes[node_name]
-            if is_user_op(node):
+        with _use_graph_caches(self._infer_type_cache, self._input_names_cache):
+            for node_name, node in user_nodes:
                 # If there is a user-defined node, skip the following steps
                 if node_name in self._inputs:
                     continue
@@ -1633,25 +1818,31 @@ class OneflowGraph(object):
                 self._parse_input(node, model_dir_path=model_dir_path)
 
                 node_inputs = oneflow_input()
-                for input_name in node.user_conf.input:
-                    node_input_paths = getattr(node.user_conf.input[input_name], "s")
-                    for i in node_input_paths:
-                        node_input = i.split("/")[0]
-                        node_inputs[node_input] = self._nodes[node_input]
+                for node_input, _ in self._node_inputs(node):
+                    node_inputs[node_input] = self._nodes[node_input]
 
                 node_outputs = []
-                for output_name in node.user_conf.output:
-                    node_output_paths = getattr(node.user_conf.output[output_name], "s")
-                    for i in node_output_paths:
-                        node_output_path = os.path.join(model_dir_path, i.replace("m.", ""))
-                        if node_output_path in self._input_path_2_name:
-                            node_outputs.append(self._input_path_2_name[node_output_path])
-                        elif node_output_path in self._output_path_2_name:
-                            node_outputs.append(self._output_path_2_name[node_output_path])
+                for node_output_path in self._node_outputs(node):
+                    if node_output_path in self._input_path_2_name:
+                        node_outputs.append(self._input_path_2_name[node_output_path][-1])
+                    elif node_output_path in self._output_path_2_name:
+                        node_outputs.append(self._output_path_2_name[node_output_path])
                 node_outputs = self._parse_output(op_name, node_outputs)
 
-                # convert
-                op = self._convert_operator(op_name, node_inputs, op_attr)
+                # ops with the same inputs and attrs share the folded expr of the first one.
+                # the key is taken before the conversion, converters may replace the inputs
+                key = _op_cache_key(op_name, node_inputs, op_attr)
+                op = self._op_cache.get(key) if key is not None else None
+                if op is None:
+                    # the inputs are already folded, only fold what the converter builds on them
+                    folded = set(node_inputs)
+                    op = _fold_converted(
+                        self._convert_operator(op_name, node_inputs, op_attr), folded
+                    )
+                    if key is not None:
+                        self._op_cache[key] = op
+                    # the input names of later ops are found by walking down to this one
+                    _var_names(op.astuple() if isinstance(op, _expr.TupleWrapper) else op)
 
                 if not isinstance(op, _expr.TupleWrapper):
                     outputs_num = 1
@@ -1664,52 +1855,37 @@ class OneflowGraph(object):
                     len(node_outputs), outputs_num, op_name
                 )
 
-                if outputs_num == 1:
-                    op = fold_constant(op)
-                else:
-                    op = _expr.TupleWrapper(fold_constant(op.astuple()), len(op))
-
-                op_temp = []
-                op_temp.append(op)
-                for i, _ in enumerate(node_outputs):
-                    if isinstance(node_outputs[i], list):
-                        for k in node_outputs[i]:
-                            self._nodes[k] = op_temp[i]
+                node_ops = [op] if outputs_num == 1 else [op[i] for i in range(outputs_num)]
+                for node_output, node_op in zip(node_outputs, node_ops):
+                    if isinstance(node_output, list):
+                        for k in node_output:
+                            self._nodes[k] = node_op
                     else:
-                        self._nodes[node_outputs[i]] = op_temp[i]
+                        self._nodes[node_output] = node_op
 
         # step 4: get the outputs
         outputs = []
-        for node_name in nodes:
-            node = nodes[node_name]
-            if is_output_op(node):
-                node_name_v2 = getattr(node.output_conf, "in").split("/")[0]
-                if node_name in self._nodes:
-                    outputs.append(self._nodes[node_name])
-                elif node_name_v2 in self._nodes:
-                    outputs.append(self._nodes[node_name_v2])
+        for node_name, node in output_nodes:
+            node_name_v2 = getattr(node.output_conf, "in").split("/")[0]
+            if node_name in self._nodes:
+                outputs.append(self._nodes[node_name])
+            elif node_name_v2 in self._nodes:
+                outputs.append(self._nodes[node_name_v2])
         outputs = outputs[0] if len(outputs) == 1 else _expr.Tuple(outputs)
 
         # step 5: get the relay IR
         free_vars = analysis.free_vars(outputs)
 
-        nodes = {v: k for k, v in self._nodes.items()}
-        free_vars = [nodes[var] for var in free_vars]
-
         # step 6: make sure the '_input.0' is the first in self._inputs
+        # every var is created by new_var under the name it is stored with in self._nodes
         for free_var in free_vars:
-            if free_var not in self._inputs:
-                self._inputs[free_var] = self._nodes[free_var]
+            self._inputs.setdefault(free_var.name_hint, free_var)
 
-        input_names = list(self._inputs.keys())
-        for input_name in input_names:
-            if input_name in self._inputs:
-                self._sort_inputs[input_name] = self._inputs[input_name]
-            else:
-                raise IndexError("{} is not in self._inputs".format(input_name))
+        # a stable sort, the other inputs keep the order they were added in
+        params = sorted(self._inputs.values(), key=lambda v: "_input.0" not in v.name_hint)
 
         # step 7: create a function from our output expression and all input variables.
-        func = _function.Function([v for _, v in self._sort_inputs.items()], outputs)
+        func = _function.Function(params, outputs)
 
         return IRModule.from_expr(func), self._params
 
@@ -1730,7 +1906,7 @@ class OneflowGraph(object):
             Converted relay function
         """
         convert_map = get_convert_map()
-        if op_name in self._identity_list:
+        if op_name in self._identity_set:
             sym = get_relay_op(op_name)(*node_inputs, **op_attr)
         elif op_name in convert_map:
             sym = convert_map[op_name](node_inputs, op_attr, self._params)
@@ -1740,14 +1916,18 @@ class OneflowGraph(object):
         return sym
 
 
+# patterns for the records of repr(graph), compiled once
+_RECORD_TYPES = ("INPUT", "PARAMETER", "BUFFER", "OUTPUT")
+_RE_RECORD = re.compile(r"(" + "|".join(_RECORD_TYPES) + r"):.*")
+_RE_SIZE = re.compile(r"size=\(.*?\)", re.S)
+_RE_DTYPE = re.compile(r"dtype=.*?\)", re.S)
+
+
 def from_oneflow(graph, model_dir_path, freeze_params=True, user_input=None):
     """
     see OneflowGraph.from_oneflow
     """
-    try:
-        import oneflow as flow
-    except ImportError:
-        raise ImportError("please check that OneFlow is installed")
+    flow = _get_oneflow()
 
     if not freeze_params and user_input is None:
         raise ValueError("if you want to specify graph input, please give the 'user_input'")
@@ -1762,18 +1942,19 @@ def from_oneflow(graph, model_dir_path, freeze_params=True, user_input=None):
     if "cuda" in graph_str:
         size_where = 3
 
-    p_size = re.compile(r"size=\(.*?\)", re.S)
-    p_type = re.compile(r"dtype=.*?\)", re.S)
-    types = ["INPUT", "PARAMETER", "BUFFER", "OUTPUT"]
-    for t in types:
-        data = re.finditer(t + ":.*", graph_str)
-        for i in data:
-            attrs = i.group().split(":")
-            size_str = re.findall(p_size, attrs[size_where])
-            type_str = re.findall(p_type, attrs[size_where])
-            assert size_str != [], "size should not be None, please check your repr(graph)"
-
-            size_attr = size_str[0].replace("size=", "")
+    # one scan over graph_str, the records are still handled in the order of _RECORD_TYPES
+    records = {t: [] for t in _RECORD_TYPES}
+    for record in _RE_RECORD.finditer(graph_str):
+        records[record.group(1)].append(record.group())
+    for t in _RECORD_TYPES:
+        for record in records[t]:
+            attrs = record.split(":")
+            # only the first size/dtype of a record is used, stop at it
+            size_str = _RE_SIZE.search(attrs[size_where])
+            type_str = _RE_DTYPE.search(attrs[size_where])
+            assert size_str is not None, "size should not be None, please check your repr(graph)"
+
+            size_attr = size_str.group().replace("size=", "")
             if size_attr[-2] == ",":
                 size_attr = size_attr.replace(",", "")
             data_size = tuple(map(int, size_attr[1:-1].split(", ")))
@@ -1781,18 +1962,18 @@ def from_oneflow(graph, model_dir_path, freeze_params=True, user_input=None):
             shape[node_name] = data_size
             dtype[node_name] = "float32"
 
-            if type_str != []:
-                type_attr = type_str[0].replace("dtype=", "").replace(")", "")
+            if type_str is not None:
+                type_attr = type_str.group().replace("dtype=", "").replace(")", "")
                 if type_attr[-1] == ",":
                     type_attr = type_attr.replace(",", "")
                 dtype[node_name] = type_attr.replace("oneflow.", "")
 
     # get graph proto, if you don't _compile the graph, the _graph_proto will be None
-    graph_input = re.search(r"INPUT:.*", graph_str).group().split(":")
+    graph_input = records["INPUT"][0].split(":")
     shape_input = tuple(
         map(
             int,
-            re.findall(p_size, graph_input[size_where])[0].replace("size=", "")[1:-1].split(", "),
+            _RE_SIZE.search(graph_input[size_where]).group().replace("size=", "")[1:-1].split(", "),
         )
     )
     if not graph._is_compiled:
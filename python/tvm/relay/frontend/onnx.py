@@ -386,6 +386,45 @@ class Unary(OnnxOpConverter):
         return get_relay_op(op_name)(*inputs)
 
 
+# the ops a legacy broadcast operand is followed back through, to the op computing
+# their first argument. batch_norm is reached through the TupleGetItem of its output.
+_CONV_CHAIN_OPS = frozenset(
+    [
+        "nn.bias_add",
+        "nn.batch_norm",
+        "nn.relu",
+        "nn.leaky_relu",
+        "nn.prelu",
+        "clip",
+        "sigmoid",
+        "tanh",
+        "add",
+        "subtract",
+        "multiply",
+        "divide",
+    ]
+)
+
+
+def _producer_is_conv(expr):
+    """
+    Check whether an expression is computed by a 2d (transposed) convolution, directly or
+    through a chain of bias_add, batch_norm and elementwise ops on its output.
+    """
+    conv_ops = ("nn.conv2d", "nn.conv2d_transpose")
+    node = expr.astuple() if isinstance(expr, _expr.TupleWrapper) else expr
+    while True:
+        if isinstance(node, _expr.TupleGetItem):
+            node = node.tuple_value
+        if not isinstance(node, _expr.Call) or not isinstance(node.op, tvm.ir.Op):
+            return False
+        if node.op.name in conv_ops:
+            return True
+        if node.op.name not in _CONV_CHAIN_OPS:
+            return False
+        node = node.args[0]
+
+
 class Elemwise(OnnxOpConverter):
     """A helper class for elemwise op converters."""
 
@@ -395,8 +434,7 @@ class Elemwise(OnnxOpConverter):
     def _impl_v1(cls, inputs, attr, params):
         assert len(inputs) == 2, "Math op {} take 2 inputs, {} given".format(cls.name, len(inputs))
         op_name = cls.name
-        conv_ops = ["conv2d", "conv2d_transpose"]
-        if attr.get("broadcast", 0) and any(x in str(inputs[0]) for x in conv_ops):
+        if attr.get("broadcast", 0) and _producer_is_conv(inputs[0]):
             # TODO(zhreshold): remove hard coded infershape
             axis = int(attr.get("axis", 0))
             inputs[1] = _op.expand_dims(inputs[1], axis=axis, num_newaxis=2)
@@ -434,13 +472,15 @@ class Pool(OnnxOpConverter):
             if attr["auto_pad"] in ("SAME_UPPER", "SAME_LOWER"):
                 if cls.name == "avg_pool":
                     pad_tuple = []
+                    strides = attr.get("strides", [1] * ndim)
                     for axis in range(len(input_shape) - 2):
                         axis_shape = input_shape[2 + axis]
-                        stride = attr.get("strides", [1] * ndim)[axis]
+                        stride = strides[axis]
                         kernel = attr["kernel_shape"][axis]
                         pad = get_pad_pair(axis_shape, kernel, stride, attr["auto_pad"])
                         pad_tuple.append(pad)
-                    pad_tuple = tuple([val for pair in zip(*pad_tuple) for val in pair])
+                    # [[before, after], ...] -> (before..., after...)
+                    pad_tuple = tuple(np.asarray(pad_tuple).T.ravel().tolist())
                     attr["pads"] = pad_tuple
                 else:
                     # Warning: Pool does not yet support dynamic shapes,
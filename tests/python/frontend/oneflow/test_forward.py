@@ -512,6 +512,15 @@ def test_activation():
             x = self.active(x)
             return x
 
+    class SoftmaxLastDim(flow.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.active = flow.nn.Softmax(dim=-1)
+
+        def forward(self, x):
+            x = self.active(x)
+            return x
+
     class Softplus(flow.nn.Module):
         def __init__(self):
             super().__init__()
@@ -566,6 +575,15 @@ def test_activation():
             x = self.active(x)
             return x
 
+    class PReLUChannel(flow.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.active = flow.nn.PReLU(num_parameters=3, init=0.1)
+
+        def forward(self, x):
+            x = self.active(x)
+            return x
+
     class SELU(flow.nn.Module):
         def __init__(self):
             super().__init__()
@@ -575,6 +593,15 @@ def test_activation():
             x = self.active(x)
             return x
 
+    class ELU(flow.nn.Module):
+        def __init__(self, alpha=1.0):
+            super().__init__()
+            self.active = flow.nn.ELU(alpha)
+
+        def forward(self, x):
+            x = self.active(x)
+            return x
+
     class SiLU(flow.nn.Module):
         def __init__(self):
             super().__init__()
@@ -630,6 +657,32 @@ def test_activation():
         verify_activation(model10, device=device)
         verify_activation(model11, device=device)
 
+    # softmax over the default and the last dim of n-d inputs
+    inputs_3d = flow.tensor(np.random.rand(2, 3, 4), dtype=flow.float32)
+    inputs_4d = flow.tensor(np.random.rand(2, 3, 4, 5), dtype=flow.float32)
+    for device in ["llvm"]:
+        verify_activation(model1, device=device, inputs=inputs_3d)
+        verify_activation(model1, device=device, inputs=inputs_4d)
+        verify_activation(SoftmaxLastDim().eval(), device=device, inputs=inputs_4d)
+
+    # the inputs are also negative, so that both branches are taken
+    inputs_neg = flow.tensor(np.random.randn(4, 5), dtype=flow.float32)
+    for device in ["llvm"]:
+        verify_activation(ELU().eval(), device=device, inputs=inputs_neg)
+        verify_activation(ELU(alpha=0.5).eval(), device=device, inputs=inputs_neg)
+        verify_activation(ELU(alpha=2.0).eval(), device=device, inputs=inputs_neg)
+        verify_activation(model8, device=device, inputs=inputs_neg)
+
+    # a per channel alpha, the inputs are also negative
+    model = PReLUChannel().eval()
+    model.active.weight = flow.nn.Parameter(flow.tensor([0.1, 0.2, 0.3], dtype=flow.float32))
+    for device in ["llvm"]:
+        verify_activation(
+            model,
+            device=device,
+            inputs=flow.tensor(np.random.randn(2, 3, 4, 5), dtype=flow.float32),
+        )
+
 
 @tvm.testing.uses_gpu
 def test_math():
@@ -710,6 +763,77 @@ def test_concat():
         verify_concat(model, device=device)
 
 
+@tvm.testing.uses_gpu
+def test_flatten():
+    class Flatten(flow.nn.Module):
+        def __init__(self, start_dim, end_dim):
+            super().__init__()
+            self.flatten = flow.nn.Flatten(start_dim, end_dim)
+
+        def forward(self, x):
+            return self.flatten(x)
+
+    inputs = flow.tensor(np.random.randn(2, 3, 4, 5), dtype=flow.float32)
+    for device in ["llvm"]:
+        for start_dim, end_dim in [(1, -1), (0, -1), (2, 3), (1, 2), (0, 1), (-3, -2)]:
+            verify_math(Flatten(start_dim, end_dim).eval(), device=device, inputs=inputs)
+
+
+def test_unsqueeze():
+    from tvm.relay.frontend.oneflow import Unsqueeze, oneflow_input
+
+    def verify_unsqueeze(shape, axes, static_shape=True):
+        data = np.random.rand(*shape).astype("float32")
+        x = relay.var("x", shape=shape if static_shape else [relay.Any()] * len(shape))
+        inputs = oneflow_input()
+        inputs["x_input.0"] = x
+        out = Unsqueeze.get_converter()(inputs, {"axes": axes}, {})
+        mod = tvm.IRModule.from_expr(relay.Function([x], out))
+        out_tvm = relay.create_executor("vm", mod=mod, target="llvm").evaluate()(data).numpy()
+
+        # the axes are inserted one after the other, in ascending order
+        out_np = data
+        for axis in sorted(axes):
+            out_np = np.expand_dims(out_np, axis)
+        assert_shape(out_np, out_tvm)
+        tvm.testing.assert_allclose(out_np, out_tvm)
+
+    verify_unsqueeze((2, 3), (0,))
+    verify_unsqueeze((2, 3), (2,))
+    verify_unsqueeze((2, 3), (0, 2))
+    verify_unsqueeze((2, 3, 4), (3, 0, 1))
+    verify_unsqueeze((2, 3), (-1,))
+    verify_unsqueeze((2, 3), (-3, -1))
+    verify_unsqueeze((2, 3), (1, -1))
+    verify_unsqueeze((2, 3), (0, 2), static_shape=False)
+
+
+def test_fold_constant_subgraph():
+    from tvm.relay.frontend.oneflow import Concat, _fold_converted, oneflow_input
+
+    def convert_concat(lhs, rhs):
+        inputs = oneflow_input()
+        inputs["lhs"] = relay.const(lhs)
+        inputs["rhs"] = relay.const(rhs)
+        # the inputs are taken before the conversion, as the frontend does
+        folded = set(inputs)
+        out = Concat.get_converter()(inputs, {"axis": 0, "max_dim_size": 4}, {})
+        return _fold_converted(out, folded)
+
+    lhs = np.random.rand(2, 3).astype("float32")
+    rhs = np.random.rand(2, 3).astype("float32")
+    # concatenate of a tuple of constants
+    out = convert_concat(lhs, rhs)
+    assert isinstance(out, relay.Constant)
+    tvm.testing.assert_allclose(out.data.numpy(), np.concatenate([lhs, rhs]))
+
+    # the cast added by the dtype promotion is folded as well
+    lhs = np.arange(6).reshape(2, 3).astype("int32")
+    out = convert_concat(lhs, rhs)
+    assert isinstance(out, relay.Constant)
+    tvm.testing.assert_allclose(out.data.numpy(), np.concatenate([lhs.astype("float32"), rhs]))
+
+
 if __name__ == "__main__":
     test_conv2d()
     test_pool2d()
@@ -720,4 +844,7 @@ if __name__ == "__main__":
     test_math()
     test_slice()
     test_concat()
+    test_flatten()
+    test_unsqueeze()
+    test_fold_constant_subgraph()
     rmdir("log")
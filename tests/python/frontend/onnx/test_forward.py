@@ -2813,6 +2813,59 @@ def test_conv(target, dev):
         )
 
 
+@tvm.testing.parametrize_targets
+def test_conv_legacy_broadcast(target, dev):
+    """A broadcast=1 Add of opset < 7 on a conv output is expanded along the channel axis."""
+
+    def verify_conv_add(with_bias, with_relu):
+        # 4 channels and a 4x4 output, so a wrong broadcast over the last dim type checks
+        x = np.random.uniform(size=(1, 3, 4, 4)).astype("float32")
+        w = np.random.uniform(size=(4, 3, 3, 3)).astype("float32")
+        b = np.random.uniform(size=(4,)).astype("float32")
+        c = np.random.uniform(size=(4,)).astype("float32")
+
+        conv_inputs = ["x", "W", "B"] if with_bias else ["x", "W"]
+        nodes = [
+            helper.make_node(
+                "Conv", conv_inputs, ["y"], kernel_shape=[3, 3], pads=[1, 1, 1, 1], strides=[1, 1]
+            )
+        ]
+        add_input = "y"
+        if with_relu:
+            nodes.append(helper.make_node("Relu", ["y"], ["r"]))
+            add_input = "r"
+        nodes.append(helper.make_node("Add", [add_input, "C"], ["out"], broadcast=1, axis=1))
+
+        initializer = [
+            helper.make_tensor("W", TensorProto.FLOAT, w.shape, w.flatten()),
+            helper.make_tensor("C", TensorProto.FLOAT, c.shape, c.flatten()),
+        ]
+        if with_bias:
+            initializer.append(helper.make_tensor("B", TensorProto.FLOAT, b.shape, b.flatten()))
+        graph = helper.make_graph(
+            nodes,
+            "conv_legacy_broadcast_test",
+            inputs=[helper.make_tensor_value_info("x", TensorProto.FLOAT, list(x.shape))],
+            outputs=[helper.make_tensor_value_info("out", TensorProto.FLOAT, [1, 4, 4, 4])],
+            initializer=initializer,
+        )
+        model = helper.make_model(graph, producer_name="conv_legacy_broadcast_test")
+
+        ref = tvm.topi.testing.conv2d_nchw_python(x, w, 1, 1)
+        if with_bias:
+            ref = ref + b.reshape(1, 4, 1, 1)
+        if with_relu:
+            ref = np.maximum(ref, 0)
+        ref = ref + c.reshape(1, 4, 1, 1)
+
+        tvm_out = get_tvm_output(model, x, target, dev, ref.shape, "float32", opset=6)
+        tvm.testing.assert_allclose(ref, tvm_out, rtol=1e-5, atol=1e-5)
+
+    verify_conv_add(with_bias=False, with_relu=False)
+    verify_conv_add(with_bias=True, with_relu=False)
+    verify_conv_add(with_bias=True, with_relu=True)
+
+
 @tvm.testing.parametrize_targets
 def test_convtranspose(target, dev):
     def verify_convtranspose_with_padding(
@@ -6625,6 +6678,7 @@ if __name__ == "__main__":
     test_batch_norm()
     test_batch_norm_dynamic_subgraph()
     test_conv()
+    test_conv_legacy_broadcast()
     test_convtranspose()
     test_unsqueeze_constant()
     test_pooling()
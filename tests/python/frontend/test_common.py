@@ -14,7 +14,12 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
-from tvm.relay.frontend.common import StrAttrsDict
+import numpy as np
+import pytest
+import tvm
+import tvm.testing
+from tvm import relay
+from tvm.relay.frontend.common import StrAttrsDict, autopad
 
 
 def test_key_is_present():
@@ -27,6 +32,36 @@ def test_key_is_not_present():
     assert not attrs.has_attr("b")
 
 
+def _run_autopad(data, static_shape, **kwargs):
+    shape = data.shape if static_shape else [relay.Any()] * data.ndim
+    x = relay.var("x", shape=shape, dtype=data.dtype)
+    out = autopad(x, **kwargs)
+    mod = tvm.IRModule.from_expr(relay.Function([x], out))
+    return relay.create_executor("vm", mod=mod, target="llvm").evaluate()(data).numpy()
+
+
+@pytest.mark.parametrize("mode", ["SAME_UPPER", "SAME_LOWER"])
+@pytest.mark.parametrize(
+    "shape, strides, kernel_shape, dilations, deconv",
+    [
+        ((1, 2, 7, 8), (1, 1), (3, 3), (1, 1), False),
+        ((1, 2, 7, 8), (2, 3), (3, 2), (1, 1), False),
+        ((1, 2, 9, 10), (2, 1), (3, 3), (2, 3), False),
+        ((1, 2, 6, 7), (2, 2), (3, 3), (1, 1), True),
+        ((1, 2, 9), (2,), (4,), (1,), False),
+    ],
+)
+def test_autopad_static_matches_dynamic(shape, strides, kernel_shape, dilations, deconv, mode):
+    """The padding computed up front for a static shape equals the one of the dynamic path."""
+    data = np.random.uniform(size=shape).astype("float32")
+    kwargs = dict(
+        strides=strides, kernel_shape=kernel_shape, dilations=dilations, deconv=deconv, mode=mode
+    )
+    static_out = _run_autopad(data, True, **kwargs)
+    dynamic_out = _run_autopad(data, False, **kwargs)
+    tvm.testing.assert_allclose(static_out, dynamic_out)
+
+
 if __name__ == "__main__":
     test_key_is_present()
     test_key_is_present()